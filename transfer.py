@@ -6,25 +6,44 @@ Downloads .mov videos from a Yandex Disk public folder and uploads them to YouTu
 Processes videos one at a time to manage storage efficiently.
 """
 
+import io
 import os
+import hashlib
 import sys
 import time
+import random
 import logging
 import json
+import queue
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Optional
-from urllib.parse import urlparse, parse_qs
+from typing import List, Dict, Optional, Callable, Tuple
 
+import httplib2
+import requests
+import urllib3
 import yadisk
 from yadisk.exceptions import YaDiskError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from googleapiclient.errors import HttpError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    # Optional faster JSON backend, fall back to the standard library
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -50,62 +69,350 @@ YANDEX_OAUTH_TOKEN = os.getenv('YANDEX_OAUTH_TOKEN', '')
 YOUTUBE_CLIENT_SECRETS_FILE = os.getenv('YOUTUBE_CLIENT_SECRETS_FILE', 'client_secret.json')
 YOUTUBE_TOKEN_FILE = 'youtube_token.json'
 UPLOADED_VIDEOS_LOG = 'uploaded_videos.json'
+UPLOADED_VIDEOS_JOURNAL = 'uploaded_videos.jsonl'
+YANDEX_LISTING_CACHE = 'yandex_listing_cache.json'
+YANDEX_LISTING_PAGE_SIZE = 200
+YANDEX_LISTING_WORKERS = 4
+
+# Key part of a public folder URL such as https://disk.yandex.ru/d/<key>
+_PUBLIC_KEY_RE = re.compile(r'/d/([^/?#]+)')
+
+# Uploaded filenames loaded from the logs, and the log file state they reflect
+_UPLOADED_CACHE = None
+_UPLOADED_CACHE_SIGNATURE = None
+# Serializes journal appends from concurrent uploads
+_UPLOADED_LOCK = threading.Lock()
+# YouTube's resumable upload protocol requires chunks in multiples of 256 KiB
+RESUMABLE_CHUNK_ALIGNMENT = 256 * 1024
+UPLOAD_CHUNK_SIZE = 32 * RESUMABLE_CHUNK_ALIGNMENT  # 8 MiB
+# Videos are already compressed, so ask for downloads without transfer encoding.
+# Download links are pre-signed, so the session's OAuth header is not sent with them.
+DOWNLOAD_HEADERS = {'Accept-Encoding': 'identity', 'Authorization': None}
+# Staged videos larger than this are downloaded as several parallel Range requests
+PARALLEL_DOWNLOAD_THRESHOLD = 64 * 1024 * 1024
+PARALLEL_DOWNLOAD_PARTS = 4
+# Stream videos straight into YouTube; set to false to stage them on disk first
+STREAM_UPLOADS = os.getenv('STREAM_UPLOADS', 'true').lower() not in ('0', 'false', 'no')
+# Number of downloaded videos allowed to wait for upload when staging on disk
+DOWNLOAD_QUEUE_SIZE = 1
+# Number of videos streamed to YouTube concurrently
+UPLOAD_WORKERS = max(1, int(os.getenv('UPLOAD_WORKERS', '1')))
+# Number of videos downloaded concurrently when staging on disk
+DOWNLOAD_WORKERS = max(1, int(os.getenv('DOWNLOAD_WORKERS', '1')))
+# Where staged videos are written, preferably a RAM-backed tmpfs
+STAGING_DIR = os.getenv('TRANSFER_STAGING') or ('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+# Bytes of STAGING_DIR promised to downloads that are still running
+_STAGING_RESERVED = 0
+_STAGING_LOCK = threading.Lock()
+# Private subdirectory of STAGING_DIR for this run, created on first use
+_STAGING_RUN_DIR = None
+
+
+def json_loads(data):
+    """Parse a JSON document from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj, indent: bool = False) -> str:
+    """Serialize an object to a JSON string, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None).decode('utf-8')
+    return json.dumps(obj, indent=2 if indent else None)
+
+
+def atomic_write(path: str, content: str):
+    """
+    Replace a file's content atomically, so readers never see a partial write.
+    
+    Args:
+        path: File to write
+        content: Text content
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, prefix='.tmp-', delete=False) as tmp:
+        tmp.write(content)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+    try:
+        os.replace(tmp.name, path)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+
+
+def jittered_backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Compute a "full jitter" retry delay.
+    
+    Args:
+        attempt: Zero-based retry attempt number
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+        
+    Returns:
+        Random delay in seconds between 0 and min(cap, base * 2 ** attempt)
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that stops calling a failing remote service for a while.
+    
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail immediately with CircuitOpenError. Once `recovery_timeout` seconds
+    have passed, a single probe call is let through (half-open state); its
+    success closes the circuit and its failure opens it again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 60.0,
+                 is_failure: Optional[Callable[[Exception], bool]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.is_failure = is_failure or (lambda e: True)
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Call func through the breaker.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open and the call was not attempted
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    raise CircuitOpenError(f"{self.name} circuit is open, skipping call")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, probe in progress")
+                self._probe_in_flight = True
+        
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record(success=not self.is_failure(e))
+            raise
+        self._record(success=True)
+        return result
+    
+    def _record(self, success: bool):
+        """Update the breaker state with the outcome of a call."""
+        with self._lock:
+            self._probe_in_flight = False
+            if success:
+                self._failures = 0
+                self.state = self.CLOSED
+                return
+            
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"{self.name} circuit opened after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ChecksumError(Exception):
+    """Raised when a downloaded file does not match its expected checksum."""
+
+
+class DownloadCancelled(Exception):
+    """Raised when a download is abandoned because the transfer is stopping."""
+
+
+class ProgressWriter:
+    """
+    File wrapper that logs download progress and optionally hashes data as it is written.
+    
+    If a stop_event is given, writes raise DownloadCancelled once it is set.
+    """
+    
+    LOG_INTERVAL = 10 * 1024 * 1024  # Log every 10MB
+    
+    def __init__(self, f, total_size: int, hasher=None, written: int = 0,
+                 stop_event: Optional[threading.Event] = None):
+        self._file = f
+        self.total_size = total_size
+        self.hasher = hasher
+        self.written = written
+        self.stop_event = stop_event
+        # Without a known size there is nothing to report, so never reach the threshold
+        if total_size > 0:
+            self._next_log_at = (written // self.LOG_INTERVAL + 1) * self.LOG_INTERVAL
+        else:
+            self._next_log_at = float('inf')
+        self._total_mb = total_size / (1024 * 1024)
+    
+    def write(self, data) -> int:
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise DownloadCancelled("Transfer is stopping")
+        written = self._file.write(data)
+        if self.hasher is not None:
+            self.hasher.update(data)
+        self.advance(len(data))
+        return written
+    
+    def advance(self, count: int):
+        """Account for count bytes written without going through write()."""
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise DownloadCancelled("Transfer is stopping")
+        self.written += count
+        if self.written >= self._next_log_at:
+            self._log_progress()
+    
+    def _log_progress(self):
+        """Log progress and schedule the next report."""
+        self._next_log_at += self.LOG_INTERVAL
+        percent = (self.written / self.total_size) * 100
+        logger.info(f"Downloaded {self.written / (1024*1024):.1f} MB / {self._total_mb:.1f} MB ({percent:.1f}%)")
+
+
+class HttpStream(io.RawIOBase):
+    """
+    Seekable read-only view over a streaming HTTP response body.
+    
+    MediaIoBaseUpload needs seek()/tell() to size the upload and to rewind to
+    the last acknowledged offset after a failed chunk. The response body can
+    only be read forward, so the most recent `window` bytes are kept in memory
+    to serve those rewinds.
+    """
+    
+    def __init__(self, response, size: int, window: int):
+        self._response = response
+        self._raw = response.raw
+        self._size = size
+        self._window = window
+        self._pos = 0
+        self._buffer = bytearray()
+        self._buffer_start = 0  # Stream offset of the first buffered byte
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position: {pos}")
+        self._pos = pos
+        return pos
+    
+    def read(self, size: int = -1) -> bytes:
+        if self._pos < self._buffer_start:
+            raise io.UnsupportedOperation(
+                f"Cannot rewind to offset {self._pos}, data before {self._buffer_start} was discarded")
+        
+        end = self._size if size is None or size < 0 else min(self._size, self._pos + size)
+        consumed = self._buffer_start + len(self._buffer)
+        while consumed < end:
+            data = self._raw.read(min(end - consumed, 1024 * 1024))
+            if not data:
+                # The upload already declared this chunk's length, so a short read would stall it
+                raise urllib3.exceptions.ProtocolError(
+                    f"Download ended at byte {consumed} of {self._size}")
+            self._buffer += data
+            consumed += len(data)
+        
+        start = self._pos - self._buffer_start
+        result = bytes(self._buffer[start:end - self._buffer_start])
+        self._pos += len(result)
+        
+        # Trim lazily so the buffer is not shifted on every small read
+        if len(self._buffer) > 2 * self._window:
+            excess = len(self._buffer) - self._window
+            del self._buffer[:excess]
+            self._buffer_start += excess
+        return result
+    
+    def close(self):
+        if not self.closed:
+            self._response.close()
+            self._buffer = bytearray()
+        super().close()
 
 
 class YandexDiskClient:
     """Client for accessing Yandex Disk files using yadisk library."""
     
+    __slots__ = ('public_key', 'oauth_token', 'base_url', 'client', 'session', 'breaker', '_public_key')
+    
     def __init__(self, public_key: str, oauth_token: Optional[str] = None):
         self.public_key = public_key
         self.oauth_token = oauth_token
         self.base_url = 'https://cloud-api.yandex.net/v1/disk'
         
-        # Initialize yadisk client if token is provided, otherwise use requests session
+        # Initialize yadisk client if token is provided
         self.client = None
-        self.session = None
         
         if self.oauth_token:
             try:
                 self.client = yadisk.Client(token=self.oauth_token)
-                # Access the underlying session for public folder API calls
-                # yadisk uses requests.Session internally, try to access it
-                if hasattr(self.client, '_session'):
-                    self.session = self.client._session
-                elif hasattr(self.client, 'session'):
-                    self.session = self.client.session
-                else:
-                    # Try to get session from the client's HTTP adapter
-                    self.session = None
                 logger.info("Initialized Yandex Disk client with OAuth token")
             except Exception as e:
                 logger.warning(f"Failed to initialize yadisk client: {e}. Will use direct API calls.")
                 self.client = None
-                self.session = None
         
-        # Import requests for fallback/direct API calls
-        import requests
-        self.requests = requests
-        
-    def _get_headers(self) -> Dict[str, str]:
-        """Get headers for API requests."""
-        headers = {}
+        # Pooled session so TCP and TLS connections are reused across API calls and downloads
+        retry = Retry(
+            total=3,
+            connect=3,
+            read=3,
+            backoff_factor=2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Every API call inherits the auth header from the session
         if self.oauth_token:
-            headers['Authorization'] = f'OAuth {self.oauth_token}'
-        return headers
-    
+            self.session.headers['Authorization'] = f'OAuth {self.oauth_token}'
+        self.breaker = CircuitBreaker('Yandex Disk')
+        
+        # The public key never changes, so extract it once
+        self._public_key = None
+        
     def _extract_public_key(self) -> str:
-        """Extract public key from Yandex Disk URL."""
-        # Try using the full URL first, fall back to just the key
-        # The API accepts both formats
-        parsed = urlparse(self.public_key)
-        if parsed.path.startswith('/d/'):
-            # Return the full URL as public_key (API accepts this)
-            return self.public_key
-        return self.public_key
+        """Extract the bare key from a Yandex Disk public URL (cached after the first call)."""
+        if self._public_key is None:
+            match = _PUBLIC_KEY_RE.search(self.public_key)
+            self._public_key = match.group(1) if match else self.public_key
+        return self._public_key
     
     def _make_request(self, method: str, url: str, **kwargs):
         """
-        Make HTTP request using yadisk session if available, otherwise use requests.
+        Make HTTP request using the pooled session, guarded by the circuit breaker.
         
         Args:
             method: HTTP method (get, post, etc.)
@@ -115,49 +422,74 @@ class YandexDiskClient:
         Returns:
             Response object
         """
-        if self.session:
-            # Use yadisk's session if available
-            func = getattr(self.session, method.lower())
-            return func(url, **kwargs)
-        else:
-            # Fallback to requests
-            func = getattr(self.requests, method.lower())
-            return func(url, **kwargs)
+        return self.breaker.call(self.session.request, method.upper(), url, **kwargs)
     
     def list_files(self) -> List[Dict]:
         """
         List all files in the public folder.
         Returns list of file dictionaries with 'name', 'path', 'size', etc.
         """
-        public_key = self._extract_public_key()
         url = f'{self.base_url}/public/resources'
         
         # Try with full URL first, then try with just the key
         params_list = [
-            {'public_key': public_key},  # Full URL
-            {'public_key': urlparse(public_key).path[3:] if urlparse(public_key).path.startswith('/d/') else public_key}  # Just the key
+            {'public_key': self.public_key},  # Full URL
+            {'public_key': self._extract_public_key()}  # Just the key
         ]
+        # Only ask for videos, in pages of YANDEX_LISTING_PAGE_SIZE items
+        for params in params_list:
+            params.update({'media_type': 'video', 'limit': YANDEX_LISTING_PAGE_SIZE})
+        
+        headers = {}
         
-        headers = self._get_headers()
+        # Revalidate the previous listing instead of downloading it again
+        cache = self._load_listing_cache()
+        if cache:
+            if cache.get('etag'):
+                headers['If-None-Match'] = cache['etag']
+            if cache.get('last_modified'):
+                headers['If-Modified-Since'] = cache['last_modified']
         
         last_error = None
         for params in params_list:
             try:
                 logger.debug(f"Trying to list files with params: {params}")
                 response = self._make_request('get', url, params=params, headers=headers, timeout=30)
+                if response.status_code == 304 and cache:
+                    files = cache['items']
+                    logger.info(f"Found {len(files)} files in Yandex Disk folder (unchanged since last run)")
+                    return files
                 response.raise_for_status()
-                data = response.json()
+                embedded = json_loads(response.content).get('_embedded', {})
+                items = embedded.get('items', [])
+                files = [item for item in items if item.get('type') == 'file']
                 
-                files = []
-                if '_embedded' in data and 'items' in data['_embedded']:
-                    for item in data['_embedded']['items']:
-                        if item.get('type') == 'file':
-                            files.append(item)
+                total = embedded.get('total')
+                if isinstance(total, int):
+                    # The total is known, so fetch the remaining pages concurrently
+                    limit = embedded.get('limit') or YANDEX_LISTING_PAGE_SIZE
+                    offsets = range(limit, total, limit)
+                    with ThreadPoolExecutor(max_workers=YANDEX_LISTING_WORKERS) as pool:
+                        pages = pool.map(lambda offset: self._fetch_listing_page(url, params, offset), offsets)
+                        for page_items in pages:
+                            files.extend(item for item in page_items if item.get('type') == 'file')
+                else:
+                    # Otherwise page through until a short page comes back
+                    offset = len(items)
+                    while len(items) >= YANDEX_LISTING_PAGE_SIZE:
+                        items = self._fetch_listing_page(url, params, offset)
+                        files.extend(item for item in items if item.get('type') == 'file')
+                        offset += len(items)
                 
+                self._save_listing_cache(
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    files
+                )
                 logger.info(f"Found {len(files)} files in Yandex Disk folder")
                 return files
                 
-            except self.requests.exceptions.HTTPError as e:
+            except requests.exceptions.HTTPError as e:
                 last_error = e
                 if e.response.status_code == 404:
                     # Try next format if this was the first attempt
@@ -175,7 +507,7 @@ class YandexDiskClient:
                     logger.error(f"HTTP error listing files from Yandex Disk: {e}")
                     logger.error(f"Response: {e.response.text if hasattr(e.response, 'text') else 'No response text'}")
                     raise
-            except (self.requests.exceptions.RequestException, YaDiskError) as e:
+            except (requests.exceptions.RequestException, YaDiskError) as e:
                 last_error = e
                 logger.error(f"Error listing files from Yandex Disk: {e}")
                 if params == params_list[0]:
@@ -189,6 +521,53 @@ class YandexDiskClient:
             raise Exception(f"Failed to access public folder. Last error: {last_error}")
         raise Exception("Failed to access public folder with both URL and key formats")
     
+    def _fetch_listing_page(self, url: str, params: Dict, offset: int) -> List[Dict]:
+        """
+        Fetch one page of the folder listing.
+        
+        Args:
+            url: Listing endpoint URL
+            params: Query parameters of the first page
+            offset: Offset of the first item on the page
+            
+        Returns:
+            Items on the page
+        """
+        logger.debug(f"Fetching listing page at offset {offset}")
+        page_params = dict(params, offset=offset)
+        response = self._make_request('get', url, params=page_params, timeout=30)
+        response.raise_for_status()
+        return json_loads(response.content).get('_embedded', {}).get('items', [])
+    
+    def _load_listing_cache(self) -> Optional[Dict]:
+        """Load the cached folder listing if it belongs to this public folder."""
+        if not os.path.exists(YANDEX_LISTING_CACHE):
+            return None
+        try:
+            with open(YANDEX_LISTING_CACHE, 'rb') as f:
+                cache = json_loads(f.read())
+        except Exception as e:
+            logger.warning(f"Could not load Yandex Disk listing cache: {e}")
+            return None
+        if cache.get('public_key') != self.public_key or 'items' not in cache:
+            return None
+        return cache
+    
+    def _save_listing_cache(self, etag: Optional[str], last_modified: Optional[str], items: List[Dict]):
+        """Save the folder listing together with its cache validators."""
+        if not etag and not last_modified:
+            return
+        cache = {
+            'public_key': self.public_key,
+            'etag': etag,
+            'last_modified': last_modified,
+            'items': items
+        }
+        try:
+            atomic_write(YANDEX_LISTING_CACHE, json_dumps(cache))
+        except Exception as e:
+            logger.warning(f"Could not save Yandex Disk listing cache: {e}")
+    
     def get_download_link(self, file_path: str) -> str:
         """
         Get download link for a specific file.
@@ -199,31 +578,23 @@ class YandexDiskClient:
         Returns:
             Direct download URL
         """
-        public_key = self._extract_public_key()
         url = f'{self.base_url}/public/resources/download'
         
         # Try with full URL first, then try with just the key
-        public_key_value = public_key
-        parsed = urlparse(public_key)
-        if parsed.path.startswith('/d/'):
-            public_key_value = parsed.path[3:]  # Extract just the key
-        
         params_list = [
-            {'public_key': public_key, 'path': file_path},  # Full URL
-            {'public_key': public_key_value, 'path': file_path}  # Just the key
+            {'public_key': self.public_key, 'path': file_path},  # Full URL
+            {'public_key': self._extract_public_key(), 'path': file_path}  # Just the key
         ]
         
-        headers = self._get_headers()
-        
         for params in params_list:
             try:
                 logger.debug(f"Trying to get download link with params: {params}")
-                response = self._make_request('get', url, params=params, headers=headers, timeout=30)
+                response = self._make_request('get', url, params=params, timeout=30)
                 response.raise_for_status()
-                data = response.json()
+                data = json_loads(response.content)
                 return data['href']
                 
-            except self.requests.exceptions.HTTPError as e:
+            except requests.exceptions.HTTPError as e:
                 if e.response.status_code == 404 and params == params_list[0]:
                     # Try next format
                     logger.debug(f"404 with full URL, trying key only format...")
@@ -231,69 +602,306 @@ class YandexDiskClient:
                 else:
                     logger.error(f"Error getting download link for {file_path}: {e}")
                     raise
-            except (self.requests.exceptions.RequestException, YaDiskError) as e:
+            except (requests.exceptions.RequestException, YaDiskError) as e:
                 logger.error(f"Error getting download link for {file_path}: {e}")
                 raise
         
         # If we get here, both formats failed
         raise Exception(f"Failed to get download link for {file_path} with both URL and key formats")
     
-    def download_file(self, download_url: str, local_path: str) -> bool:
+    def download_file(self, download_url: str, local_path: str, expected_md5: Optional[str] = None,
+                      size: Optional[int] = None, stop_event: Optional[threading.Event] = None) -> bool:
         """
         Download a file from Yandex Disk.
         
         Args:
             download_url: Direct download URL
             local_path: Local file path to save to
+            expected_md5: MD5 hex digest reported by Yandex Disk, verified if given
+            size: File size reported by Yandex Disk, large files are downloaded in parallel parts
+            stop_event: Event that abandons the download between blocks once set
             
         Returns:
             True if successful, False otherwise
         """
         max_retries = 3
-        retry_delay = 5
+        
+        os.makedirs(os.path.dirname(local_path) or '.', exist_ok=True)
+        
+        if size and size > PARALLEL_DOWNLOAD_THRESHOLD and hasattr(os, 'pwrite'):
+            try:
+                if self._download_parallel(download_url, local_path, size, expected_md5, stop_event):
+                    return True
+            except CircuitOpenError as e:
+                logger.error(f"Not downloading {local_path}: {e}")
+                return False
+            except DownloadCancelled:
+                logger.info(f"Download of {local_path} cancelled")
+                return False
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError, ChecksumError) as e:
+                logger.warning(f"Parallel download of {local_path} failed: {e}. Falling back to a single stream.")
+        
+        # Progress survives failed attempts so the next one can resume with a Range request
+        downloaded = 0
+        hasher = hashlib.md5() if expected_md5 else None
         
         for attempt in range(max_retries):
+            if stop_event is not None and stop_event.is_set():
+                logger.info(f"Download of {local_path} cancelled")
+                return False
+            resumable = True
             try:
-                logger.info(f"Downloading to {local_path} (attempt {attempt + 1}/{max_retries})...")
-                
-                # Use session if available, otherwise use requests directly
-                if self.session:
-                    response = self.session.get(download_url, stream=True, timeout=300)
+                headers = dict(DOWNLOAD_HEADERS)
+                if downloaded > 0:
+                    headers['Range'] = f'bytes={downloaded}-'
+                    logger.info(f"Resuming download of {local_path} at {downloaded / (1024*1024):.1f} MB (attempt {attempt + 1}/{max_retries})...")
                 else:
-                    response = self.requests.get(download_url, stream=True, timeout=300)
-                
-                response.raise_for_status()
+                    logger.info(f"Downloading to {local_path} (attempt {attempt + 1}/{max_retries})...")
                 
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded = 0
+                response = self._make_request('get', download_url, headers=headers, stream=True, timeout=300)
                 
-                os.makedirs(os.path.dirname(local_path) if os.path.dirname(local_path) else '.', exist_ok=True)
+                with response:
+                    response.raise_for_status()
+                    
+                    if downloaded > 0 and response.status_code != 206:
+                        logger.info("Server ignored the Range request, restarting download")
+                        downloaded = 0
+                        hasher = hashlib.md5() if expected_md5 else None
+                    
+                    if response.status_code == 206:
+                        # Content-Range: bytes <start>-<end>/<total>
+                        total = response.headers.get('content-range', '').rpartition('/')[2]
+                        total_size = int(total) if total.isdigit() else 0
+                    else:
+                        total_size = int(response.headers.get('content-length', 0))
+                    
+                    # Copy the raw body in 1 MiB blocks instead of iterating chunks in Python,
+                    # only going through urllib3's decoder if the server ignored identity encoding
+                    response.raw.decode_content = 'content-encoding' in response.headers
+                    # Byte offsets of a decoded body do not match the encoded one, so it cannot be resumed
+                    resumable = not response.raw.decode_content
+                    
+                    with open(local_path, 'r+b' if downloaded > 0 else 'wb') as f:
+                        if downloaded == 0:
+                            if hasattr(os, 'posix_fadvise'):
+                                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                            # Reserve the whole file up front so it gets contiguous extents
+                            if total_size > 0 and hasattr(os, 'posix_fallocate'):
+                                try:
+                                    os.posix_fallocate(f.fileno(), 0, total_size)
+                                except OSError as e:
+                                    logger.debug(f"Could not preallocate {local_path}: {e}")
+                        f.seek(downloaded)
+                        
+                        writer = ProgressWriter(f, total_size, hasher, written=downloaded, stop_event=stop_event)
+                        try:
+                            shutil.copyfileobj(response.raw, writer, length=1024 * 1024)
+                        finally:
+                            downloaded = writer.written
+                        if writer.written < total_size:
+                            if resumable:
+                                # The body ended early; the next attempt resumes from here with a Range request
+                                raise urllib3.exceptions.ProtocolError(
+                                    f"Connection closed at byte {writer.written} of {total_size}")
+                            # A decoded body has no fixed relation to the encoded Content-Length,
+                            # so just drop the unused preallocated tail
+                            f.truncate(writer.written)
+                        
+                        # The file is read once by the uploader and deleted, so keep it out of
+                        # the page cache. Only clean pages can be dropped, so flush it first.
+                        if hasattr(os, 'posix_fadvise'):
+                            f.flush()
+                            os.fdatasync(f.fileno())
+                            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
                 
-                with open(local_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if total_size > 0:
-                                percent = (downloaded / total_size) * 100
-                                if downloaded % (10 * 1024 * 1024) == 0:  # Log every 10MB
-                                    logger.info(f"Downloaded {downloaded / (1024*1024):.1f} MB / {total_size / (1024*1024):.1f} MB ({percent:.1f}%)")
+                if expected_md5:
+                    actual_md5 = hasher.hexdigest()
+                    if actual_md5 != expected_md5.lower():
+                        os.remove(local_path)
+                        resumable = False
+                        raise ChecksumError(f"MD5 mismatch for {local_path}: expected {expected_md5}, got {actual_md5}")
                 
                 logger.info(f"Successfully downloaded {local_path} ({downloaded / (1024*1024):.1f} MB)")
                 return True
                 
-            except (self.requests.exceptions.RequestException, YaDiskError) as e:
+            except CircuitOpenError as e:
+                logger.error(f"Not downloading {local_path}: {e}")
+                return False
+            except DownloadCancelled:
+                logger.info(f"Download of {local_path} cancelled")
+                return False
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, YaDiskError, ChecksumError) as e:
                 logger.warning(f"Download attempt {attempt + 1} failed: {e}")
+                error_response = getattr(e, 'response', None)
+                if not resumable or (error_response is not None and error_response.status_code == 416):
+                    # Start over on the next attempt
+                    downloaded = 0
+                    hasher = hashlib.md5() if expected_md5 else None
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
+                    time.sleep(jittered_backoff(attempt))
                 else:
                     logger.error(f"Failed to download file after {max_retries} attempts")
                     return False
         
         return False
     
+    def _download_parallel(self, download_url: str, local_path: str, size: int,
+                           expected_md5: Optional[str] = None,
+                           stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Download a file as PARALLEL_DOWNLOAD_PARTS concurrent Range requests.
+        
+        Each part is written at its own offset of a preallocated file with
+        os.pwrite, so the workers share nothing but the progress counter.
+        
+        Args:
+            download_url: Direct download URL
+            local_path: Local file path to save to
+            size: File size in bytes
+            expected_md5: MD5 hex digest reported by Yandex Disk, verified if given
+            stop_event: Event that abandons the download between blocks once set
+            
+        Returns:
+            True if the file was downloaded, False if the server does not serve
+            byte ranges and the file has to be downloaded as a single stream
+            
+        Raises:
+            ChecksumError: If the downloaded file does not match expected_md5
+            DownloadCancelled: If stop_event was set during the download
+        """
+        part_size = -(-size // PARALLEL_DOWNLOAD_PARTS)
+        ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+        
+        # The first part doubles as a probe: a 200 reply means byte ranges are not supported
+        first_response = self._open_range(download_url, *ranges[0])
+        total = first_response.headers.get('content-range', '').rpartition('/')[2]
+        if first_response.status_code != 206 or total != str(size) or 'content-encoding' in first_response.headers:
+            first_response.close()
+            logger.info("Server did not return the expected byte range, downloading as a single stream")
+            return False
+        
+        logger.info(f"Downloading to {local_path} in {len(ranges)} parallel parts...")
+        progress = ProgressWriter(None, size, stop_event=stop_event)
+        progress_lock = threading.Lock()
+        failed = threading.Event()
+        
+        def fetch_part(fd: int, start: int, end: int, response=None):
+            if response is None:
+                if failed.is_set():
+                    return
+                response = self._open_range(download_url, start, end)
+            with response:
+                if response.status_code != 206:
+                    raise requests.exceptions.HTTPError(
+                        f"Expected a partial response for bytes {start}-{end}, got {response.status_code}",
+                        response=response)
+                response.raw.decode_content = False
+                offset = start
+                while offset <= end:
+                    if failed.is_set():
+                        # Another part failed, the download is abandoned
+                        return
+                    data = response.raw.read(min(1024 * 1024, end + 1 - offset))
+                    if not data:
+                        raise urllib3.exceptions.ProtocolError(
+                            f"Connection closed at byte {offset} of part {start}-{end}")
+                    view = memoryview(data)
+                    while view:
+                        count = os.pwrite(fd, view, offset)
+                        offset += count
+                        view = view[count:]
+                    with progress_lock:
+                        progress.advance(len(data))
+        
+        try:
+            fd = os.open(local_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        except OSError:
+            first_response.close()
+            raise
+        try:
+            # Reserve the whole file up front so it gets contiguous extents
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError as e:
+                    logger.debug(f"Could not preallocate {local_path}: {e}")
+            os.ftruncate(fd, size)
+            
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(fetch_part, fd, *ranges[0], first_response)]
+                futures += [executor.submit(fetch_part, fd, start, end) for start, end in ranges[1:]]
+                done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                if any(future.exception() for future in done):
+                    failed.set()
+                for future in futures:
+                    future.result()
+            
+            if expected_md5:
+                # Parts arrive out of order, so hash the finished file in one sequential pass
+                hasher = hashlib.md5()
+                with open(local_path, 'rb') as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b''):
+                        hasher.update(block)
+                actual_md5 = hasher.hexdigest()
+                if actual_md5 != expected_md5.lower():
+                    os.remove(local_path)
+                    raise ChecksumError(f"MD5 mismatch for {local_path}: expected {expected_md5}, got {actual_md5}")
+            
+            # Keep the file out of the page cache, as in the single stream download
+            if hasattr(os, 'posix_fadvise'):
+                os.fdatasync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+            first_response.close()
+        
+        logger.info(f"Successfully downloaded {local_path} ({size / (1024*1024):.1f} MB)")
+        return True
+    
+    def _open_range(self, download_url: str, start: int, end: int):
+        """Start a streamed GET of bytes start-end (inclusive) of a download URL."""
+        headers = dict(DOWNLOAD_HEADERS)
+        headers['Range'] = f'bytes={start}-{end}'
+        response = self._make_request('get', download_url, headers=headers, stream=True, timeout=300)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        return response
+    
+    def open_stream(self, download_url: str, size: Optional[int] = None) -> HttpStream:
+        """
+        Open a file from Yandex Disk for streaming without saving it locally.
+        
+        Args:
+            download_url: Direct download URL
+            size: Expected file size, used if the response has no Content-Length or an encoded body
+            
+        Returns:
+            Seekable stream over the response body
+        """
+        response = self._make_request('get', download_url, headers=DOWNLOAD_HEADERS, stream=True, timeout=300)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        
+        response.raw.decode_content = 'content-encoding' in response.headers
+        # Content-Length counts encoded bytes, so it is only the video size for an unencoded body
+        content_length = int(response.headers.get('content-length', 0))
+        if content_length > 0 and not response.raw.decode_content:
+            size = content_length
+        if not size:
+            response.close()
+            raise ValueError(f"Unknown size for streamed download: {download_url}")
+        
+        return HttpStream(response, size, window=UPLOAD_CHUNK_SIZE)
+    
     def close(self):
-        """Close the yadisk client if it was initialized."""
+        """Close the HTTP session and the yadisk client if it was initialized."""
+        self.session.close()
         if self.client:
             try:
                 self.client.close()
@@ -304,9 +912,16 @@ class YandexDiskClient:
 class YouTubeUploader:
     """Client for uploading videos to YouTube."""
     
+    __slots__ = ('client_secrets_file', 'youtube', 'credentials', '_local', 'breaker')
+    
     def __init__(self, client_secrets_file: str):
         self.client_secrets_file = client_secrets_file
         self.youtube = None
+        self.credentials = None
+        # httplib2 connections are not thread-safe, so each thread gets its own service object
+        self._local = threading.local()
+        # Client errors such as quota or permission problems do not mean YouTube is down
+        self.breaker = CircuitBreaker('YouTube', is_failure=self._is_service_failure)
         self._authenticate()
     
     def _authenticate(self):
@@ -316,7 +931,8 @@ class YouTubeUploader:
         # Try to load existing credentials
         if os.path.exists(YOUTUBE_TOKEN_FILE):
             try:
-                creds = Credentials.from_authorized_user_file(YOUTUBE_TOKEN_FILE, SCOPES)
+                with open(YOUTUBE_TOKEN_FILE, 'rb') as f:
+                    creds = Credentials.from_authorized_user_info(json_loads(f.read()), SCOPES)
             except Exception as e:
                 logger.warning(f"Could not load existing credentials: {e}")
         
@@ -360,12 +976,25 @@ class YouTubeUploader:
                     logger.info("Successfully obtained credentials!")
             
             # Save credentials for next run
-            with open(YOUTUBE_TOKEN_FILE, 'w') as token:
-                token.write(creds.to_json())
+            atomic_write(YOUTUBE_TOKEN_FILE, creds.to_json())
         
-        self.youtube = build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, credentials=creds)
+        self.credentials = creds
+        self.youtube = self._build_service()
+        self._local.youtube = self.youtube
         logger.info("Successfully authenticated with YouTube API")
     
+    def _build_service(self):
+        """Build a YouTube service object with the current credentials."""
+        return build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, credentials=self.credentials)
+    
+    def _get_service(self):
+        """Get the YouTube service object for the calling thread."""
+        service = getattr(self._local, 'youtube', None)
+        if service is None:
+            service = self._build_service()
+            self._local.youtube = service
+        return service
+    
     def upload_video(self, file_path: str, title: Optional[str] = None) -> Optional[str]:
         """
         Upload a video to YouTube.
@@ -380,17 +1009,63 @@ class YouTubeUploader:
         if not title:
             title = Path(file_path).stem
         
+        def create_media():
+            return MediaFileUpload(
+                file_path,
+                chunksize=UPLOAD_CHUNK_SIZE,
+                resumable=True,
+                mimetype='video/quicktime'
+            )
+        
+        return self._upload(create_media, title, file_path)
+    
+    def upload_from_stream(self, open_stream: Callable[[], io.IOBase], title: str,
+                           source_name: str) -> Optional[str]:
+        """
+        Upload a video to YouTube from a stream instead of a local file.
+        
+        Args:
+            open_stream: Callable returning a new seekable stream for each attempt
+            title: Video title
+            source_name: Original filename, used in the video description
+            
+        Returns:
+            YouTube video ID if successful, None otherwise
+        """
+        def create_media():
+            return MediaIoBaseUpload(
+                open_stream(),
+                mimetype='video/quicktime',
+                chunksize=UPLOAD_CHUNK_SIZE,
+                resumable=True
+            )
+        
+        return self._upload(create_media, title, source_name)
+    
+    def _upload(self, create_media: Callable[[], MediaIoBaseUpload], title: str,
+                source_name: str) -> Optional[str]:
+        """
+        Insert a video, retrying failed attempts.
+        
+        Args:
+            create_media: Callable returning the media body for each attempt
+            title: Video title
+            source_name: Source file path or name, used in logs and description
+            
+        Returns:
+            YouTube video ID if successful, None otherwise
+        """
         max_retries = 3
-        retry_delay = 10
         
         for attempt in range(max_retries):
+            media = None
             try:
-                logger.info(f"Uploading {file_path} to YouTube (attempt {attempt + 1}/{max_retries})...")
+                logger.info(f"Uploading {source_name} to YouTube (attempt {attempt + 1}/{max_retries})...")
                 
                 body = {
                     'snippet': {
                         'title': title,
-                        'description': f'Uploaded from Yandex Disk: {Path(file_path).name}',
+                        'description': f'Uploaded from Yandex Disk: {Path(source_name).name}',
                         'tags': ['Yandex Disk', 'API Upload'],
                         'categoryId': '22'  # People & Blogs
                     },
@@ -399,14 +1074,9 @@ class YouTubeUploader:
                     }
                 }
                 
-                media = MediaFileUpload(
-                    file_path,
-                    chunksize=-1,
-                    resumable=True,
-                    mimetype='video/quicktime'
-                )
+                media = create_media()
                 
-                insert_request = self.youtube.videos().insert(
+                insert_request = self._get_service().videos().insert(
                     part=','.join(body.keys()),
                     body=body,
                     media_body=media
@@ -419,42 +1089,104 @@ class YouTubeUploader:
                 return video_id
                 
             except HttpError as e:
-                error_content = json.loads(e.content.decode('utf-8'))
-                error_reason = error_content.get('error', {}).get('errors', [{}])[0].get('reason', 'unknown')
+                status = e.resp.status
                 
-                if error_reason == 'quotaExceeded':
-                    logger.error("YouTube API quota exceeded. Please try again later.")
-                    sys.exit(1)
-                elif error_reason == 'rateLimitExceeded':
-                    logger.warning(f"Rate limit exceeded. Waiting {retry_delay * (attempt + 1)} seconds...")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay * (attempt + 1))
-                        continue
-                else:
-                    logger.error(f"YouTube API error: {e}")
+                # Server errors are retried based on the status alone
+                if status in (429, 500, 502, 503, 504):
+                    logger.warning(f"Retriable YouTube API error {status}: {e}")
                     if attempt < max_retries - 1:
-                        time.sleep(retry_delay * (attempt + 1))
+                        time.sleep(jittered_backoff(attempt))
                         continue
                     return None
-                    
+                
+                # Quota and rate limit errors are both 403s, told apart by their reason
+                if status == 403:
+                    error_reason = self._get_error_reason(e)
+                    if error_reason == 'quotaExceeded':
+                        logger.error("YouTube API quota exceeded. Please try again later.")
+                        sys.exit(1)
+                    elif error_reason == 'rateLimitExceeded':
+                        delay = jittered_backoff(attempt)
+                        logger.warning(f"Rate limit exceeded. Waiting {delay:.1f} seconds...")
+                        if attempt < max_retries - 1:
+                            time.sleep(delay)
+                            continue
+                        return None
+                
+                logger.error(f"YouTube API error: {e}")
+                return None
+                
+            except CircuitOpenError as e:
+                logger.error(f"Not uploading {source_name}: {e}")
+                return None
             except Exception as e:
                 logger.error(f"Unexpected error uploading video: {e}")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
+                    time.sleep(jittered_backoff(attempt))
                     continue
                 return None
+            finally:
+                if media is not None:
+                    media.stream().close()
         
         return None
     
+    @staticmethod
+    def _is_service_failure(error: Exception) -> bool:
+        """
+        Tell whether an error from next_chunk() means YouTube itself is failing.
+        
+        Streamed uploads read the Yandex Disk download inside next_chunk(), so
+        urllib3 errors from that side must not count against YouTube.
+        
+        Args:
+            error: Exception raised by the upload call
+            
+        Returns:
+            True for 5xx responses and transport errors on the YouTube connection
+        """
+        if isinstance(error, HttpError):
+            return error.resp.status >= 500
+        return isinstance(error, (httplib2.HttpLib2Error, OSError))
+    
+    @staticmethod
+    def _get_error_reason(error: HttpError) -> str:
+        """
+        Get the reason code (e.g. 'quotaExceeded') of a YouTube API error.
+        
+        Args:
+            error: HttpError raised by the API client
+            
+        Returns:
+            Reason code, or 'unknown' if the error has none
+        """
+        # HttpError already parsed the error body into error_details, but it prefers the
+        # google.rpc 'details' list (reasons like 'RATE_LIMIT_EXCEEDED') over the legacy
+        # 'errors' list, whose entries carry a 'domain' next to reasons like 'quotaExceeded'
+        details = getattr(error, 'error_details', None)
+        if isinstance(details, list) and details and isinstance(details[0], dict) and 'domain' in details[0]:
+            return details[0].get('reason', 'unknown')
+        
+        try:
+            error_content = json_loads(error.content)
+            return error_content.get('error', {}).get('errors', [{}])[0].get('reason', 'unknown')
+        except (ValueError, AttributeError, IndexError):
+            return 'unknown'
+    
     def _resumable_upload(self, insert_request):
         """Execute a resumable upload."""
         response = None
-        error = None
         retry = 0
+        base_sleep = 1.0
+        max_sleep = 60.0
+        prev_sleep = base_sleep
         
         while response is None:
+            error = None
             try:
-                status, response = insert_request.next_chunk()
+                status, response = self.breaker.call(insert_request.next_chunk)
+                if status is not None:
+                    logger.info(f"Uploaded {status.progress() * 100:.1f}%")
                 if response is not None:
                     if 'id' in response:
                         return response
@@ -465,6 +1197,8 @@ class YouTubeUploader:
                     error = f"A retriable HTTP error {e.resp.status} occurred:\n{e.content}"
                 else:
                     raise
+            except CircuitOpenError:
+                raise
             except Exception as e:
                 error = f"A retriable error occurred: {e}"
             
@@ -474,48 +1208,446 @@ class YouTubeUploader:
                 if retry > 3:
                     raise Exception(f"No longer attempting to retry. {error}")
                 
-                max_sleep = 2 ** retry
-                sleep_seconds = min(max_sleep, 60)
-                logger.info(f"Sleeping {sleep_seconds} seconds and then retrying...")
-                time.sleep(sleep_seconds)
+                # Decorrelated jitter: each delay grows randomly from the previous one
+                prev_sleep = min(max_sleep, random.uniform(base_sleep, prev_sleep * 3))
+                logger.info(f"Sleeping {prev_sleep:.1f} seconds and then retrying...")
+                time.sleep(prev_sleep)
+
+
+def _uploaded_logs_signature() -> tuple:
+    """Get (mtime, size) of both upload logs to detect changes by other writers."""
+    signature = []
+    for path in (UPLOADED_VIDEOS_LOG, UPLOADED_VIDEOS_JOURNAL):
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
 
 
 def load_uploaded_videos() -> set:
     """Load set of already uploaded video filenames."""
+    return set(_load_uploaded_cache())
+
+
+def _load_uploaded_cache() -> set:
+    """Get the cached set of uploaded filenames, reloading it if the logs changed."""
+    global _UPLOADED_CACHE, _UPLOADED_CACHE_SIGNATURE
+    
+    # Reuse the cached set unless the logs were changed by another process
+    signature = _uploaded_logs_signature()
+    if _UPLOADED_CACHE is not None and signature == _UPLOADED_CACHE_SIGNATURE:
+        return _UPLOADED_CACHE
+    
+    uploaded = set()
+    
+    # Compacted log, a single JSON document (also the format of earlier versions)
     if os.path.exists(UPLOADED_VIDEOS_LOG):
         try:
-            with open(UPLOADED_VIDEOS_LOG, 'r') as f:
-                data = json.load(f)
-                return set(data.get('uploaded_files', []))
+            with open(UPLOADED_VIDEOS_LOG, 'rb') as f:
+                data = json_loads(f.read())
+                # 'videos' is keyed by filename, 'uploaded_files' may repeat names
+                uploaded.update(data.get('videos') or data.get('uploaded_files', []))
         except Exception as e:
             logger.warning(f"Could not load uploaded videos log: {e}")
-    return set()
+    
+    # Append-only journal with one JSON record per line
+    if os.path.exists(UPLOADED_VIDEOS_JOURNAL):
+        try:
+            with open(UPLOADED_VIDEOS_JOURNAL, 'rb') as f:
+                for line in f:
+                    try:
+                        uploaded.add(json_loads(line)['filename'])
+                    except (ValueError, KeyError):
+                        # Skip a partially written line from an interrupted run
+                        continue
+        except Exception as e:
+            logger.warning(f"Could not load uploaded videos journal: {e}")
+    
+    _UPLOADED_CACHE = uploaded
+    _UPLOADED_CACHE_SIGNATURE = signature
+    return uploaded
 
 
 def save_uploaded_video(filename: str, video_id: str):
-    """Save uploaded video info to log file."""
-    data = {'uploaded_files': [], 'videos': {}}
+    """Append uploaded video info to the journal, unless it is already recorded."""
+    with _UPLOADED_LOCK:
+        _save_uploaded_video(filename, video_id)
+
+
+def _save_uploaded_video(filename: str, video_id: str):
+    """Append uploaded video info to the journal; the caller holds _UPLOADED_LOCK."""
+    global _UPLOADED_CACHE, _UPLOADED_CACHE_SIGNATURE
     
-    if os.path.exists(UPLOADED_VIDEOS_LOG):
-        try:
-            with open(UPLOADED_VIDEOS_LOG, 'r') as f:
-                data = json.load(f)
-        except Exception:
-            pass
-    
-    if 'uploaded_files' not in data:
-        data['uploaded_files'] = []
-    if 'videos' not in data:
-        data['videos'] = {}
-    
-    data['uploaded_files'].append(filename)
-    data['videos'][filename] = {
+    if filename in _load_uploaded_cache():
+        logger.info(f"{filename} is already recorded as uploaded")
+        return
+    
+    record = {
+        'filename': filename,
         'video_id': video_id,
         'uploaded_at': time.strftime('%Y-%m-%d %H:%M:%S')
     }
     
-    with open(UPLOADED_VIDEOS_LOG, 'w') as f:
-        json.dump(data, f, indent=2)
+    # The cache stays valid only if nobody else touched the logs since it was loaded
+    cache_current = _UPLOADED_CACHE is not None and _uploaded_logs_signature() == _UPLOADED_CACHE_SIGNATURE
+    
+    with open(UPLOADED_VIDEOS_JOURNAL, 'a') as f:
+        f.write(json_dumps(record) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    
+    if cache_current:
+        _UPLOADED_CACHE.add(filename)
+        _UPLOADED_CACHE_SIGNATURE = _uploaded_logs_signature()
+    else:
+        _UPLOADED_CACHE = None
+
+
+def compact_uploaded_videos():
+    """
+    Fold the uploads journal into uploaded_videos.json and empty the journal.
+    
+    Uploads are appended to the journal one line at a time; compacting once per
+    run keeps it short without rewriting the full log after every upload.
+    """
+    global _UPLOADED_CACHE
+    
+    if not os.path.exists(UPLOADED_VIDEOS_JOURNAL) or os.path.getsize(UPLOADED_VIDEOS_JOURNAL) == 0:
+        return
+    
+    try:
+        data = {'uploaded_files': [], 'videos': {}}
+        if os.path.exists(UPLOADED_VIDEOS_LOG):
+            with open(UPLOADED_VIDEOS_LOG, 'rb') as f:
+                data = json_loads(f.read())
+            data.setdefault('uploaded_files', [])
+            data.setdefault('videos', {})
+        
+        with open(UPLOADED_VIDEOS_JOURNAL, 'rb') as f:
+            for line in f:
+                try:
+                    record = json_loads(line)
+                    filename = record['filename']
+                except (ValueError, KeyError):
+                    continue
+                if filename not in data['videos']:
+                    data['uploaded_files'].append(filename)
+                data['videos'][filename] = {
+                    'video_id': record.get('video_id'),
+                    'uploaded_at': record.get('uploaded_at')
+                }
+        
+        atomic_write(UPLOADED_VIDEOS_LOG, json_dumps(data, indent=True))
+        # Every journal record is now in the log, so the journal can be emptied
+        open(UPLOADED_VIDEOS_JOURNAL, 'w').close()
+        _UPLOADED_CACHE = None
+    except Exception as e:
+        logger.warning(f"Could not compact uploaded videos journal: {e}")
+
+
+def stream_video(yandex_client: YandexDiskClient, youtube_uploader: YouTubeUploader,
+                 file_info: Dict) -> bool:
+    """
+    Transfer one video by streaming its download directly into its upload.
+    
+    Args:
+        yandex_client: Yandex Disk client
+        youtube_uploader: YouTube uploader
+        file_info: File dictionary from the Yandex Disk listing
+        
+    Returns:
+        True if the video was uploaded, False otherwise
+    """
+    filename = file_info['name']
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Processing: {filename}")
+    logger.info(f"{'='*60}")
+    
+    # Get download link
+    try:
+        download_url = yandex_client.get_download_link(file_info['path'])
+    except Exception as e:
+        logger.error(f"Failed to get download link for {filename}: {e}")
+        return False
+    
+    # Stream the video from Yandex Disk straight into the YouTube upload
+    video_id = youtube_uploader.upload_from_stream(
+        lambda: yandex_client.open_stream(download_url, file_info.get('size')),
+        title=Path(filename).stem,
+        source_name=filename
+    )
+    
+    if not video_id:
+        logger.error(f"Failed to upload {filename} to YouTube")
+        return False
+    
+    # Save upload record
+    save_uploaded_video(filename, video_id)
+    return True
+
+
+def transfer_streamed(yandex_client: YandexDiskClient, youtube_uploader: YouTubeUploader,
+                      files: List[Dict]) -> Tuple[int, int]:
+    """
+    Transfer videos by streaming each download directly into its upload,
+    running up to UPLOAD_WORKERS transfers at the same time.
+    
+    Args:
+        yandex_client: Yandex Disk client
+        youtube_uploader: YouTube uploader
+        files: File dictionaries of the videos to transfer
+        
+    Returns:
+        Tuple of (successful_uploads, failed_uploads)
+    """
+    successful_uploads = 0
+    failed_uploads = 0
+    stop_event = threading.Event()
+    
+    def transfer(file_info: Dict) -> Optional[bool]:
+        # Do not start new transfers once one of them aborted (e.g. quota exceeded)
+        if stop_event.is_set():
+            return None
+        try:
+            return stream_video(yandex_client, youtube_uploader, file_info)
+        except BaseException:
+            stop_event.set()
+            raise
+    
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+        for uploaded in pool.map(transfer, files):
+            if uploaded:
+                successful_uploads += 1
+            elif uploaded is not None:
+                failed_uploads += 1
+    
+    return successful_uploads, failed_uploads
+
+
+def get_staging_path(file_info: Dict) -> Tuple[str, bool]:
+    """
+    Choose where to stage a video: STAGING_DIR if it has room for it, the current directory otherwise.
+    
+    Space for a video placed in STAGING_DIR stays reserved until
+    release_staging_space is called, so concurrent downloads cannot all
+    claim the same free space. Videos go into a private subdirectory so
+    they cannot collide with other runs or users of a shared STAGING_DIR.
+    
+    Args:
+        file_info: File dictionary from the Yandex Disk listing
+        
+    Returns:
+        Tuple of (local file path, whether it is in STAGING_DIR)
+    """
+    global _STAGING_RESERVED, _STAGING_RUN_DIR
+    size = file_info.get('size') or 0
+    try:
+        with _STAGING_LOCK:
+            # Running downloads may not have preallocated yet, so count their reservations too.
+            # Leave some headroom, a tmpfs staging directory shares its space with RAM.
+            free = shutil.disk_usage(STAGING_DIR).free - _STAGING_RESERVED
+            if size and free > size * 1.1:
+                if _STAGING_RUN_DIR is None:
+                    _STAGING_RUN_DIR = tempfile.mkdtemp(prefix='yadisk_to_youtube-', dir=STAGING_DIR)
+                _STAGING_RESERVED += size
+                return os.path.join(_STAGING_RUN_DIR, file_info['name']), True
+    except OSError as e:
+        logger.warning(f"Could not check free space in {STAGING_DIR}: {e}")
+    return os.path.join(os.getcwd(), file_info['name']), False
+
+
+def release_staging_space(size: int):
+    """Give back STAGING_DIR space reserved by get_staging_path once the download has ended."""
+    global _STAGING_RESERVED
+    with _STAGING_LOCK:
+        _STAGING_RESERVED -= size
+
+
+def remove_staging_dir():
+    """Delete this run's private staging subdirectory and anything left in it."""
+    global _STAGING_RUN_DIR
+    with _STAGING_LOCK:
+        if _STAGING_RUN_DIR is not None:
+            shutil.rmtree(_STAGING_RUN_DIR, ignore_errors=True)
+            _STAGING_RUN_DIR = None
+
+
+def download_video(yandex_client: YandexDiskClient, file_info: Dict,
+                   stop_event: Optional[threading.Event] = None) -> str:
+    """
+    Download a single video to STAGING_DIR, or to the current directory if it does not fit.
+    
+    Args:
+        yandex_client: Yandex Disk client
+        file_info: File dictionary from the Yandex Disk listing
+        stop_event: Event that abandons the download once set
+        
+    Returns:
+        Local file path
+        
+    Raises:
+        Exception: If the download link could not be resolved or the download failed
+    """
+    filename = file_info['name']
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Processing: {filename}")
+    logger.info(f"{'='*60}")
+    
+    download_url = yandex_client.get_download_link(file_info['path'])
+    
+    local_path, staged = get_staging_path(file_info)
+    try:
+        if not yandex_client.download_file(download_url, local_path, file_info.get('md5'), file_info.get('size'),
+                                           stop_event):
+            raise Exception(f"Download of {filename} failed after retries")
+    except BaseException:
+        if staged:
+            # A partial (and preallocated) file would hold staging space, possibly RAM, after the run
+            remove_local_file(local_path)
+        raise
+    finally:
+        if staged:
+            release_staging_space(file_info['size'])
+    
+    return local_path
+
+
+def remove_local_file(local_path: str):
+    """Delete a downloaded video, logging instead of raising if that fails."""
+    try:
+        os.remove(local_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not delete local file {local_path}: {e}")
+
+
+def download_worker(yandex_client: YandexDiskClient, files: List[Dict], download_q: queue.Queue,
+                    workers: int = 1, stop_event: Optional[threading.Event] = None):
+    """
+    Download videos to disk and hand them over to the uploader.
+    
+    Puts a (file_info, result) tuple on the queue for each file, where result
+    is the local path or the exception that made the download fail, followed
+    by a None sentinel.
+    Up to `workers` videos are downloaded at the same time; a worker waits
+    for room in the queue before starting its next download.
+    
+    Args:
+        yandex_client: Yandex Disk client
+        files: File dictionaries of the videos to download
+        download_q: Bounded queue shared with the uploading thread
+        workers: Number of concurrent downloads
+        stop_event: Event set by the uploader to abandon the running downloads and not start new ones
+    """
+    def download_and_enqueue(file_info: Dict):
+        if stop_event is not None and stop_event.is_set():
+            return
+        try:
+            result = download_video(yandex_client, file_info, stop_event)
+        except Exception as e:
+            result = e
+        download_q.put((file_info, result))
+    
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Consume the results so worker exceptions are raised here
+            for _ in pool.map(download_and_enqueue, files):
+                pass
+    finally:
+        download_q.put(None)
+
+
+def transfer_staged(yandex_client: YandexDiskClient, youtube_uploader: YouTubeUploader,
+                    files: List[Dict]) -> Tuple[int, int]:
+    """
+    Transfer videos through local storage, downloading the next video while
+    the current one is uploading.
+    
+    Args:
+        yandex_client: Yandex Disk client
+        youtube_uploader: YouTube uploader
+        files: File dictionaries of the videos to transfer
+        
+    Returns:
+        Tuple of (successful_uploads, failed_uploads)
+    """
+    successful_uploads = 0
+    failed_uploads = 0
+    
+    # The queue bounds how many downloaded videos wait on disk at once
+    download_q = queue.Queue(maxsize=DOWNLOAD_QUEUE_SIZE)
+    stop_event = threading.Event()
+    downloader = threading.Thread(
+        target=download_worker,
+        args=(yandex_client, files, download_q, DOWNLOAD_WORKERS, stop_event),
+        daemon=True
+    )
+    downloader.start()
+    
+    finished = False
+    try:
+        while True:
+            item = download_q.get()
+            if item is None:
+                finished = True
+                break
+            
+            file_info, local_path = item
+            filename = file_info['name']
+            if isinstance(local_path, Exception):
+                logger.error(f"Failed to download {filename}: {local_path}")
+                failed_uploads += 1
+                continue
+            
+            # Upload to YouTube
+            try:
+                video_id = youtube_uploader.upload_video(local_path, title=Path(filename).stem)
+            except BaseException:
+                # Quota exit or Ctrl-C: the drain below only sees videos still in the queue
+                if os.path.dirname(local_path) != os.getcwd():
+                    remove_local_file(local_path)
+                raise
+            
+            if video_id:
+                # Save upload record
+                save_uploaded_video(filename, video_id)
+                successful_uploads += 1
+            
+                # Delete local file
+                try:
+                    os.remove(local_path)
+                    logger.info(f"Deleted local file: {local_path}")
+                except Exception as e:
+                    logger.warning(f"Could not delete local file {local_path}: {e}")
+            else:
+                logger.error(f"Failed to upload {filename} to YouTube")
+                failed_uploads += 1
+                if os.path.dirname(local_path) == os.getcwd():
+                    # Keep the file for manual retry
+                    logger.info(f"Keeping local file for manual retry: {local_path}")
+                else:
+                    # Do not hold staging space (possibly RAM) for a video the next run downloads again
+                    remove_local_file(local_path)
+    finally:
+        if not finished:
+            # Uploading stopped early (e.g. quota exceeded), the running downloads abort
+            # at their next block, so draining the queue does not wait for them to finish
+            stop_event.set()
+            while True:
+                item = download_q.get()
+                if item is None:
+                    break
+                # Downloaded videos that will not be uploaded in this run are not kept
+                if not isinstance(item[1], Exception):
+                    remove_local_file(item[1])
+    
+    downloader.join()
+    return successful_uploads, failed_uploads
 
 
 def main():
@@ -534,8 +1666,8 @@ def main():
         sys.exit(1)
     
     try:
-        # Load already uploaded videos
-        uploaded_files = load_uploaded_videos()
+        # Load already uploaded videos, compared case-insensitively
+        uploaded_files = frozenset(name.casefold() for name in load_uploaded_videos())
         logger.info(f"Found {len(uploaded_files)} already uploaded videos")
         
         # List files from Yandex Disk
@@ -546,63 +1678,44 @@ def main():
             return
         
         # Filter .mov files
-        mov_files = [f for f in files if f['name'].lower().endswith('.mov')]
+        mov_files = [f for f in files if f['name'].casefold().endswith('.mov')]
         logger.info(f"Found {len(mov_files)} .mov files to process")
         
         if not mov_files:
             logger.info("No .mov files found. Exiting.")
             return
         
+        # Skip videos that were already uploaded
+        pending_files = []
+        for file_info in mov_files:
+            if file_info['name'].casefold() in uploaded_files:
+                logger.info(f"Skipping {file_info['name']} (already uploaded)")
+                continue
+            pending_files.append(file_info)
+        
+        # Resumable uploads need the size up front, so videos without one are staged on disk
+        if STREAM_UPLOADS:
+            streamed_files = [f for f in pending_files if f.get('size')]
+            staged_files = [f for f in pending_files if not f.get('size')]
+        else:
+            streamed_files = []
+            staged_files = pending_files
+        
         # Process each video
         successful_uploads = 0
         failed_uploads = 0
         
-        for file_info in mov_files:
-            filename = file_info['name']
-            file_path = file_info['path']
-            
-            # Skip if already uploaded
-            if filename in uploaded_files:
-                logger.info(f"Skipping {filename} (already uploaded)")
-                continue
-            
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Processing: {filename}")
-            logger.info(f"{'='*60}")
-            
-            # Get download link
-            try:
-                download_url = yandex_client.get_download_link(file_path)
-            except Exception as e:
-                logger.error(f"Failed to get download link for {filename}: {e}")
-                failed_uploads += 1
-                continue
-            
-            # Download file
-            local_path = os.path.join(os.getcwd(), filename)
-            if not yandex_client.download_file(download_url, local_path):
-                logger.error(f"Failed to download {filename}")
-                failed_uploads += 1
-                continue
-            
-            # Upload to YouTube
-            video_id = youtube_uploader.upload_video(local_path, title=Path(filename).stem)
-            
-            if video_id:
-                # Save upload record
-                save_uploaded_video(filename, video_id)
-                successful_uploads += 1
-                
-                # Delete local file
-                try:
-                    os.remove(local_path)
-                    logger.info(f"Deleted local file: {local_path}")
-                except Exception as e:
-                    logger.warning(f"Could not delete local file {local_path}: {e}")
-            else:
-                logger.error(f"Failed to upload {filename} to YouTube")
-                failed_uploads += 1
-                # Keep the file for manual retry
+        if streamed_files:
+            successful, failed = transfer_streamed(yandex_client, youtube_uploader, streamed_files)
+            successful_uploads += successful
+            failed_uploads += failed
+        
+        if staged_files:
+            if STREAM_UPLOADS:
+                logger.info(f"Staging {len(staged_files)} videos of unknown size on disk")
+            successful, failed = transfer_staged(yandex_client, youtube_uploader, staged_files)
+            successful_uploads += successful
+            failed_uploads += failed
         
         # Summary
         logger.info(f"\n{'='*60}")
@@ -614,6 +1727,8 @@ def main():
         # Clean up Yandex Disk client
         if yandex_client:
             yandex_client.close()
+        compact_uploaded_videos()
+        remove_staging_dir()
 
 
 if __name__ == '__main__':